@@ -1,9 +1,11 @@
+import asyncio
 import logging
 import os
 
 from dotenv import load_dotenv
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CallbackQueryHandler,
     CommandHandler,
@@ -11,7 +13,8 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-import requests
+
+from utils import configure_tmdb_pool, fetch_movie_details_tmdb, search_movie_tmdb
 
 # Load environment variables
 load_dotenv()
@@ -20,35 +23,19 @@ load_dotenv()
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
 )
+# httpx logs every request (including each getUpdates poll) at INFO.
+logging.getLogger("httpx").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-
-# Function to search for movies on TMDB
-def search_movie(query, api_key):
-    base_url = "https://api.themoviedb.org/3/search/movie"
-    params = {"api_key": api_key, "query": query}
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        return response.json()["results"]
-    else:
-        return None
-
-
-# Function to get movie details from TMDB
-def get_movie_details(movie_id, api_key):
-    base_url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-    params = {"api_key": api_key}
-    response = requests.get(base_url, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return None
+START_TEXT = "Hello! Send me a movie name to search for."
+MISSING_INPUT_TEXT = "Please Enter the Movie name or Bot not configured yet !"
+SELECT_MOVIE_TEXT = "Select a movie from the list:"
+NO_RESULTS_TEXT = "No movies found with that name."
+DETAILS_FAILED_TEXT = "Failed to fetch movie details."
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "Hello! Send me a movie name to search for."
-    )
+    await update.message.reply_text(START_TEXT)
 
 
 async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -56,10 +43,12 @@ async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     tmdb_api_key = os.getenv("TMDB_API_KEY")
 
     if not movie_name or not tmdb_api_key:
-        await update.message.reply_text("Please Enter the Movie name or Bot not configured yet !")
+        await update.message.reply_text(MISSING_INPUT_TEXT)
         return
 
-    search_results = search_movie(movie_name, tmdb_api_key)
+    search_results = await asyncio.to_thread(
+        search_movie_tmdb, movie_name, tmdb_api_key
+    )
 
     if search_results:
         keyboard = [
@@ -71,41 +60,44 @@ async def handle_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
             for movie in search_results[:5]  # Limit to 5 results
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(
-            "Select a movie from the list:", reply_markup=reply_markup
-        )
+        await update.message.reply_text(SELECT_MOVIE_TEXT, reply_markup=reply_markup)
     else:
-        await update.message.reply_text("No movies found with that name.")
+        await update.message.reply_text(NO_RESULTS_TEXT)
 
 
-async def handle_button_click(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_movie_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    callback_data = query.data
-    if callback_data.startswith("movie_id_"):
-        movie_id = callback_data.split("_")[-1]
-        tmdb_api_key = os.getenv("TMDB_API_KEY")
-
-        movie_details = get_movie_details(movie_id, tmdb_api_key)
-
-        if movie_details:
-            movie_title = movie_details["title"]
-            tmdb_id = movie_details["id"]
-            poster_path = movie_details["poster_path"]
-            poster_url = (
-                f"https://image.tmdb.org/t/p/w500{poster_path}"
-                if poster_path
-                else "No poster available"
-            )
-            response_message = (
-                f"Title: {movie_title}\n"
-                f"TMDB ID: {tmdb_id}\n"
-                f"Poster: {poster_url}"
-            )
-            await query.edit_message_text(response_message)
-        else:
-            await query.edit_message_text("Failed to fetch movie details.")
+    movie_id = context.matches[0].group(1)
+    tmdb_api_key = os.getenv("TMDB_API_KEY")
+
+    movie_details = await asyncio.to_thread(
+        fetch_movie_details_tmdb, movie_id, tmdb_api_key
+    )
+
+    if movie_details:
+        movie_title = movie_details["title"]
+        tmdb_id = movie_details["id"]
+        poster_path = movie_details["poster_path"]
+        poster_url = (
+            f"https://image.tmdb.org/t/p/w500{poster_path}"
+            if poster_path
+            else "No poster available"
+        )
+        response_message = (
+            f"Title: {movie_title}\n"
+            f"TMDB ID: {tmdb_id}\n"
+            f"Poster: {poster_url}"
+        )
+        await query.edit_message_text(response_message)
+    else:
+        await query.edit_message_text(DETAILS_FAILED_TEXT)
+
+
+async def handle_unknown_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Acknowledge buttons we have no handler for so the client stops spinning.
+    await update.callback_query.answer()
 
 
 def main():
@@ -115,13 +107,72 @@ def main():
         print("Please set the TELEGRAM_BOT_TOKEN in the .env file.")
         return
 
-    app = Application.builder().token(bot_token).build()
+    try:
+        concurrent_updates = int(os.getenv("CONCURRENT_UPDATES", "16"))
+    except ValueError:
+        print("CONCURRENT_UPDATES in the .env file must be an integer.")
+        return
+
+    # Every concurrent update may be doing a TMDb lookup at the same time.
+    configure_tmdb_pool(concurrent_updates)
+
+    # Process updates concurrently so one slow TMDB lookup does not hold up
+    # every other user's update behind it.
+    builder = (
+        Application.builder()
+        .token(bot_token)
+        .concurrent_updates(concurrent_updates)
+        # Size the HTTP pool to at least the number of handlers that may be
+        # sending at once, so concurrent updates do not queue for a connection.
+        .connection_pool_size(max(64, concurrent_updates))
+        .pool_timeout(10)
+    )
+
+    # Keep outgoing calls under Telegram's 30 msg/s bot-wide limit and retry
+    # on RetryAfter instead of failing the handler. AIORateLimiter needs the
+    # python-telegram-bot[rate-limiter] extra (see requirements.txt).
+    try:
+        builder = builder.rate_limiter(AIORateLimiter(max_retries=3))
+    except RuntimeError:
+        logger.warning(
+            "aiolimiter is not installed; running without the rate limiter. "
+            'Install "python-telegram-bot[rate-limiter]" to enable it.'
+        )
+
+    app = builder.build()
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_search))
-    app.add_handler(CallbackQueryHandler(handle_button_click))
+    app.add_handler(
+        CallbackQueryHandler(handle_movie_selection, pattern=r"^movie_id_(\d+)$")
+    )
+    app.add_handler(CallbackQueryHandler(handle_unknown_button))
+
+    webhook_url = os.getenv("WEBHOOK_URL")
 
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    if webhook_url:
+        # An empty WEBHOOK_SECRET would be rejected by set_webhook.
+        webhook_secret = os.getenv("WEBHOOK_SECRET") or None
+        if webhook_secret is None:
+            logger.warning(
+                "WEBHOOK_SECRET is not set; the webhook endpoint is protected "
+                "only by the bot token in its URL path."
+            )
+
+        # Telegram pushes updates to us. TLS is expected to be terminated by a
+        # reverse proxy, so the plain-HTTP listener binds to localhost unless
+        # WEBHOOK_LISTEN says otherwise. Needs the python-telegram-bot[webhooks]
+        # extra (see requirements.txt).
+        app.run_webhook(
+            listen=os.getenv("WEBHOOK_LISTEN", "127.0.0.1"),
+            port=int(os.getenv("WEBHOOK_PORT", "8443")),
+            url_path=bot_token,
+            webhook_url=f"{webhook_url.rstrip('/')}/{bot_token}",
+            secret_token=webhook_secret,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    else:
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == "__main__":
@@ -1,53 +1,134 @@
+import atexit
+import copy
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-from telebot import types
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from config import TMDB_API_KEY
 import re
 
-def search_movie_tmdb(query):
+logger = logging.getLogger(__name__)
+
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_TIMEOUT = 10
+
+# One keep-alive session for all TMDb calls, so warm lookups reuse an open
+# TLS connection.
+_tmdb_session = requests.Session()
+atexit.register(_tmdb_session.close)
+
+
+def configure_tmdb_pool(pool_size):
+    """Sizes the TMDb connection pool. Pass the number of lookups that may run
+    at once so no connection is discarded when all of them are in flight."""
+    _tmdb_session.mount(
+        "https://",
+        requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size),
+    )
+
+
+def ttl_cache(ttl=86400, maxsize=4096):
+    """Caches non-empty results for `ttl` seconds, keyed on the positional
+    arguments with the first (query) argument normalized; decorated functions
+    must take positional-only parameters. Callers get a copy of the cached
+    value, so mutating a result does not affect other callers. Least recently
+    used entries are evicted once `maxsize` is reached."""
+
+    def decorator(func):
+        cache = OrderedDict()
+        # Lookups run in worker threads, so guard the shared OrderedDict.
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = args
+            if args and isinstance(args[0], str):
+                key = (args[0].strip().lower(),) + args[1:]
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    cache.move_to_end(key)
+                    return copy.deepcopy(entry[1])
+
+            result = func(*args)
+            if result:
+                with lock:
+                    cache[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+                    cache.move_to_end(key)
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+@ttl_cache()
+def search_movie_tmdb(query, api_key=TMDB_API_KEY, /):
     """Searches for a movie on TMDb based on the query and returns search results."""
-    url = f"https://api.themoviedb.org/3/search/movie?api_key={TMDB_API_KEY}&query={query}"
+    url = f"{TMDB_BASE_URL}/search/movie"
     try:
-        response = requests.get(url)
+        response = _tmdb_session.get(
+            url, params={"api_key": api_key, "query": query}, timeout=TMDB_TIMEOUT
+        )
         response.raise_for_status()  # Raise an exception for bad status codes
         data = response.json()
         return data.get('results', [])
     except requests.exceptions.RequestException as e:
-        print(f"Error during TMDb API call: {e}")
+        logger.error("Error during TMDb API call: %s", e)
         return []
 
-def fetch_movie_details_tmdb(movie_id):
+@ttl_cache()
+def fetch_movie_details_tmdb(movie_id, api_key=TMDB_API_KEY, /):
     """Fetches a movie's details on TMDb based on the movie ID."""
-    url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={TMDB_API_KEY}&language=en-US"
+    url = f"{TMDB_BASE_URL}/movie/{movie_id}"
     try:
-        response = requests.get(url)
+        response = _tmdb_session.get(
+            url,
+            params={"api_key": api_key, "language": "en-US"},
+            timeout=TMDB_TIMEOUT,
+        )
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Error during TMDb API call for movie details: {e}")
+        logger.error("Error during TMDb API call for movie details: %s", e)
         return None
 
 
+# Static keyboards are built once; InlineKeyboardMarkup is immutable, so the
+# same instance can be sent in any number of replies.
+_POST_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("TMDb ID", callback_data='tmdb_id')],
+    [InlineKeyboardButton("Poster Link", callback_data='poster_link')],
+    [InlineKeyboardButton("Add Download Link", callback_data='add_download_link')],
+    [InlineKeyboardButton("Done", callback_data='done')],
+])
+
+_DOWNLOAD_LINK_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Add Another Download Link", callback_data='add_download_link')],
+    [InlineKeyboardButton("Done", callback_data='download_done')],
+])
+
+
 def create_post_menu_keyboard():
     """Creates inline keyboard for post creation options."""
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton("TMDb ID", callback_data='tmdb_id'))
-    keyboard.add(types.InlineKeyboardButton("Poster Link", callback_data='poster_link'))
-    keyboard.add(types.InlineKeyboardButton("Add Download Link", callback_data='add_download_link'))
-    keyboard.add(types.InlineKeyboardButton("Done", callback_data='done'))
-    return keyboard
+    return _POST_MENU_KEYBOARD
 
 
 def create_download_link_keyboard():
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(types.InlineKeyboardButton("Add Another Download Link", callback_data='add_download_link'))
-    keyboard.add(types.InlineKeyboardButton("Done", callback_data='download_done'))
-    return keyboard
+    return _DOWNLOAD_LINK_KEYBOARD
 
 def create_post_list_keyboard(posts):
-    keyboard = types.InlineKeyboardMarkup()
-    for post_id, post_data in posts.items():
-        keyboard.add(types.InlineKeyboardButton(post_data['title'], callback_data=f'edit_post_{post_id}'))
-    return keyboard
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(post_data['title'], callback_data=f'edit_post_{post_id}')]
+        for post_id, post_data in posts.items()
+    ])
 
 
 def format_download_links(download_links):